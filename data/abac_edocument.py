@@ -1,9 +1,6 @@
 import random
-from collections import defaultdict
-
-# probability
-def probability(p):
-    return random.random() < p
+from collections import Counter, defaultdict
+from itertools import groupby
 
 # params for scale
 # nUsers = 400
@@ -52,8 +49,13 @@ offices = {
 for customerTenant in customerTenants:
     offices[customerTenant] = 0
 
+# prebuilt office names per tenant, shared by users and documents
+tenant_offices = {tenant: [f"{tenant}Office{n}" for n in range(1, count + 1)] for tenant, count in offices.items()}
+
 # organizations aka tenants
 class Organization:
+    __slots__ = ("orgId", "departments", "offices")
+
     def __init__(self, orgId, departments, offices):
         self.orgId = orgId
         self.departments = departments
@@ -61,265 +63,232 @@ class Organization:
 
 # users aka subjects
 class User:
+    __slots__ = ("userId", "role", "organization", "tenant", "department", "office", "position", "projects", "supervisor", "supervisee", "payrollingPermissions", "registered")
+
     def __init__(self, userId, role, organization, department=None, office=None, position=None):
         self.userId = userId
         self.role = role
         self.organization = organization
+        self.tenant = organization.orgId
         self.department = department if department else "none"
         self.office = office if office else "none"
         self.position = position if position else "none"
-        self.projects = set()
+        self.projects = []
         self.supervisor = None
-        self.supervisee = set()
+        self.supervisee = []
         self.payrollingPermissions = False
         self.registered = False
 
     def __str__(self):
-        attributes = [
-            f"role={self.role}",
-            f"position={self.position}",
-            f"tenant={self.organization.orgId}",
-            f"department={self.department}",
-            f"office={self.office}",
-            f"registered={'True' if self.registered else 'False'}",
-            f"projects={{{' '.join(self.projects)}}}",
-            f"supervisor={self.supervisor if self.supervisor else 'none'}",
-            f"supervisee={{{' '.join(self.supervisee)}}}",
-            f"payrollingPermissions={self.payrollingPermissions}"
-        ]
-        return f"userAttrib({self.userId}, {', '.join(attributes)})"
+        return (
+            f"userAttrib({self.userId}, role={self.role}, position={self.position}, "
+            f"tenant={self.tenant}, department={self.department}, office={self.office}, "
+            f"registered={self.registered}, projects={{{' '.join(self.projects)}}}, "
+            f"supervisor={self.supervisor or 'none'}, supervisee={{{' '.join(self.supervisee)}}}, "
+            f"payrollingPermissions={self.payrollingPermissions})"
+        )
 
 # generate organizations / tenants
 organizations = {tenant: Organization(tenant, departments[tenant], offices[tenant]) for tenant in tenants}
 for customerTenant in customerTenants:
     organizations[customerTenant] = Organization(customerTenant, departments[customerTenant], offices.get(customerTenant, 0))
 
-# generate users
-users = []
-users_by_department = defaultdict(list)
-for i in range(nUsers):
-    tenant = random.choice(tenants)
-    
-    valid_positions = positions if offices[tenant] > 0 else [p for p in positions if p not in ["secretary", "director"]]
-    position = random.choice(valid_positions)
-    
-    office = "none"
-    if offices[tenant] > 0 or position in ["secretary", "director"]:
-        office = f"{tenant}Office{random.randint(1, offices[tenant])}" if offices[tenant] > 0 else "none"
-
-    department = random.choice(departments[tenant])
-    user = User(f"user{i}", "employee", organizations[tenant], department, office, position)
-    users.append(user)
-    users_by_department[(tenant, department)].append(user)
-
-# generate helpdesk operators
-helpdeskOperators = []
-for i in range(nHelpdeskOperators):
-    tenant = random.choice(tenants)
-    user = User(f"hdop{i}", "helpdesk", organizations[tenant])
-    helpdeskOperators.append(user)
-
-# generate application admins
-applicationAdmins = []
-for i in range(nApplicationAdmins):
-    tenant = random.choice(tenants)
-    user = User(f"admin{i}", "admin", organizations[tenant])
-    applicationAdmins.append(user)
-
-# generate customers
-customers = []
-for i in range(nCustomers):
-    tenant = random.choice(customerTenants)
-    user = User(f"cstmr{i}", "customer", organizations[tenant], department=random.choice(get_customer_departments(tenant)))
-    customers.append(user)
-
-users.extend(helpdeskOperators)
-users.extend(applicationAdmins)
-users.extend(customers)
-
-# supervisor logic
+# positions available per tenant; secretaries and directors need an office
+valid_positions_by_tenant = {tenant: positions if offices[tenant] > 0 else [p for p in positions if p not in {"secretary", "director"}] for tenant in tenants}
+
+# position rank used to order supervisor chains
 position_hierarchy = {"secretary": 1, "officeManager": 2, "seniorOfficeManager": 3, "director": 4}
-for (tenant, department), dept_users in users_by_department.items():
-    dept_users.sort(key=lambda u: position_hierarchy.get(u.position, 0), reverse=True)
-    for i, user in enumerate(dept_users):
-        if i > 0:
-            user.supervisor = dept_users[i - 1].userId
-            dept_users[i - 1].supervisee.add(user.userId)
-
-# update registered attribute based on if they are supervisor
-for user in users:
-    if user.supervisee:
-        user.registered = True
-    else:
-        user.registered = False
-
-# assign payrolling permissions
-for (tenant, department), dept_users in users_by_department.items():
-    random.choice(dept_users).payrollingPermissions = True
-    for user in dept_users:
-        if probability(0.5):
-            user.payrollingPermissions = True
-
-def get_random_users_from_tenant(users, tenant, count):
-    tenant_users = [user for user in users if user.organization.orgId == tenant]
-    return random.sample(tenant_users, min(count, len(tenant_users)))
+
+def get_random_users_from_tenant(users_by_tenant, tenant, count):
+    pool = users_by_tenant[tenant]
+    return random.sample(pool, min(count, len(pool)))
 
 # resources aka documents
 class Document:
-    def __init__(self, docId, docType, owner, confidential=False, containsPersonalInfo=False):
+    __slots__ = ("docId", "docType", "owner", "confidential", "containsPersonalInfo", "tenant", "department", "office", "recipients")
+
+    def __init__(self, docId, docType, owner, users_by_office, users_by_tenant, confidential=False, containsPersonalInfo=False):
         self.docId = docId
         self.docType = docType
         self.owner = owner
         self.confidential = confidential
         self.containsPersonalInfo = containsPersonalInfo
-        self.tenant = owner.organization.orgId
+        self.tenant = owner.tenant
         self.department = owner.department
-        self.office = f"{self.tenant}Office{random.randint(1, offices[self.tenant])}" if offices[self.tenant] > 0 else "none"
+        self.office = random.choice(tenant_offices[self.tenant]) if offices[self.tenant] > 0 else "none"
         self.recipients = set()
 
         if self.office != "none":
-            office_users = [user for user in users if user.office == self.office]
-            self.recipients.update(office_users)
+            self.recipients.update(users_by_office[self.office])
         else:
-            self.recipients.update(get_random_users_from_tenant(users, self.tenant, 5))
+            self.recipients.update(get_random_users_from_tenant(users_by_tenant, self.tenant, 5))
 
-        self.recipients.update(get_random_users_from_tenant(users, self.tenant, 3))
+        self.recipients.update(get_random_users_from_tenant(users_by_tenant, self.tenant, 3))
 
     def __str__(self):
-        attributes = [
-            f"type={self.docType}",
-            f"owner={self.owner.userId}",
-            f"tenant={self.tenant}",
-            f"department={self.department}",
-            f"office={self.office}",
-            f"recipients={{{' '.join(user.userId for user in self.recipients)}}}",
-            f"isConfidential={'True' if self.confidential else 'False'}",
-            f"containsPersonalInfo={'True' if self.containsPersonalInfo else 'False'}"
-        ]
-        return f"resourceAttrib({self.docId}, {', '.join(attributes)})"
-
-# generate documents
-documents = []
-for i in range(nDocuments):
-    owner = random.choice(users)
-    docType = random.choice(documentTypes)
-    confidential = probability(0.6)
-    containsPersonalInfo = probability(0.2)
-    doc = Document(f"doc{i}", docType, owner, confidential, containsPersonalInfo)
-    documents.append(doc)
-
-# assign resources as projects
-for doc in documents:
-    doc.owner.projects.add(doc.docId)
-
-# output
-filename = "edocument_1000.abac"
-with open(filename, "w", encoding="utf-8") as f:
-    f.write("# ABAC policy for document management system.\n\n")
-    f.write("#------------------------------------------------------------\n")
-    f.write("# User Attribute Data\n")
-    f.write("#------------------------------------------------------------\n\n")
-    for user in users:
-        f.write(str(user) + "\n")
-    
-    f.write("\n#------------------------------------------------------------\n")
-    f.write("# Resource Attribute Data\n")
-    f.write("#------------------------------------------------------------\n\n")
-    for doc in documents:
-        f.write(str(doc) + "\n")
-
-    # rules
-    f.write("\n#------------------------------------------------------------\n")
-    f.write("# ABAC Rules\n")
-    f.write("#------------------------------------------------------------\n\n")
-
+        return (
+            f"resourceAttrib({self.docId}, type={self.docType}, owner={self.owner.userId}, "
+            f"tenant={self.tenant}, department={self.department}, office={self.office}, "
+            f"recipients={{{' '.join(self.recipients)}}}, "
+            f"isConfidential={self.confidential}, containsPersonalInfo={self.containsPersonalInfo})"
+        )
+
+# ABAC rules as (comment, rule) pairs, rendered once into RULES_SECTION
+RULES = [
     # eDocs
-    f.write("# 1. An Unregistered Receiver can only view documents sent to them.\n")
-    f.write("rule(role [ {customer}, registered [ {False}; ; {view}; uid [ recipients)\n\n")
-
-    f.write("# 2. Helpdesk members can search and view meta-information of documents in the application.\n")
-    f.write("rule(role [ {helpdesk}; ; {search readMetaInfo}; uid [ recipients)\n\n")
-
-    f.write("# 3. Helpdesk members can only read the content of documents belonging to tenants they are assigned responsible.\n")
-    f.write("rule(role [ {helpdesk}; isConfidential [ {False}; {view}; tenant = tenant)\n\n")
-
-    f.write("# 4. Application admins can view documents that are not confidential.\n")
-    f.write("rule(role [ {admin}; isConfidential [ {False}; {view}; )\n\n")
-
+    ("1. An Unregistered Receiver can only view documents sent to them.", "rule(role [ {customer}, registered [ {False}; ; {view}; uid [ recipients)"),
+    ("2. Helpdesk members can search and view meta-information of documents in the application.", "rule(role [ {helpdesk}; ; {search readMetaInfo}; uid [ recipients)"),
+    ("3. Helpdesk members can only read the content of documents belonging to tenants they are assigned responsible.", "rule(role [ {helpdesk}; isConfidential [ {False}; {view}; tenant = tenant)"),
+    ("4. Application admins can view documents that are not confidential.", "rule(role [ {admin}; isConfidential [ {False}; {view}; )"),
     # large bank
-    f.write("# 5. A supervisor can read documents sent by their supervisees.\n")
-    f.write("rule(role [ {employee}, registered [ {True}, tenant [ {largeBank}; ; {view}; supervisee ] owner)\n\n")
-
-    f.write("# 6. A project member can read all sent documents related to the project.\n")
-    f.write("rule(role [ {employee}, tenant [ {largeBank}; ; {view}; projects ] rid)\n\n")
-
-    f.write("# 7. Only members of the sales department can send, view, or search invoices.\n")
-    f.write("rule(role [ {employee}, department [ {largeBankSales}; type [ {invoice}; {send view search}; )\n\n")
-
-    f.write("# 8. Only members of the ICT department can send banking notes and view their status.\n")
-    f.write("rule(role [ {employee}, department [ {largeBankICT}; type [ {bankingNote}; {send readMetaInfo}; )\n\n")
-
-    f.write("# 9. Only employees responsible for payrolling can send and view paychecks.\n")
-    f.write("rule(role [ {employee}, tenant [ {largeBank}, payrollingPermissions [ {True}; type [ {paycheck}; {send view}; )\n\n")
-
-    f.write("# 10. Only sales department members can send sales offers.\n")
-    f.write("rule(role [ {employee}, department [ {largeBankSales}; type [ {salesOffer}; {send}; )\n\n")
-
-    f.write("# 11. Only the bank office manager can send documents.\n")
-    f.write("rule(role [ {employee}, tenant [ {largeBank}, position [ {officeManager seniorOfficeManager}; ; {send}; )\n\n")
-
-    f.write("# 12. Audit department members can read all invoices, offers, and documents except those containing personal information.\n")
-    f.write("rule(role [ {employee}, department [ {largeBankAudit}; type [ {invoice salesOffer}, containsPersonalInfo [ {False}; {view}; )\n\n")
-
+    ("5. A supervisor can read documents sent by their supervisees.", "rule(role [ {employee}, registered [ {True}, tenant [ {largeBank}; ; {view}; supervisee ] owner)"),
+    ("6. A project member can read all sent documents related to the project.", "rule(role [ {employee}, tenant [ {largeBank}; ; {view}; projects ] rid)"),
+    ("7. Only members of the sales department can send, view, or search invoices.", "rule(role [ {employee}, department [ {largeBankSales}; type [ {invoice}; {send view search}; )"),
+    ("8. Only members of the ICT department can send banking notes and view their status.", "rule(role [ {employee}, department [ {largeBankICT}; type [ {bankingNote}; {send readMetaInfo}; )"),
+    ("9. Only employees responsible for payrolling can send and view paychecks.", "rule(role [ {employee}, tenant [ {largeBank}, payrollingPermissions [ {True}; type [ {paycheck}; {send view}; )"),
+    ("10. Only sales department members can send sales offers.", "rule(role [ {employee}, department [ {largeBankSales}; type [ {salesOffer}; {send}; )"),
+    ("11. Only the bank office manager can send documents.", "rule(role [ {employee}, tenant [ {largeBank}, position [ {officeManager seniorOfficeManager}; ; {send}; )"),
+    ("12. Audit department members can read all invoices, offers, and documents except those containing personal information.", "rule(role [ {employee}, department [ {largeBankAudit}; type [ {invoice salesOffer}, containsPersonalInfo [ {False}; {view}; )"),
     # large bank leasing
-    f.write("# 13. Only members of Customer Care can view traffic fines.\n")
-    f.write("rule(role [ {employee}, department [ {largeBankLeasingCustomerCare}; type [ {trafficFine}; {view}; )\n\n")
-
-    f.write("# 14. Only sales users can send invoices.\n#     Only Customer Care Office members can manually bill a customer.\n")
-    f.write("rule(role [ {employee}, department [ {largeBankLeasingSales largeBankLeasingCustomerCare}; type [ {invoice}; {send}; )\n\n")
-
+    ("13. Only members of Customer Care can view traffic fines.", "rule(role [ {employee}, department [ {largeBankLeasingCustomerCare}; type [ {trafficFine}; {view}; )"),
+    ("14. Only sales users can send invoices.\n#     Only Customer Care Office members can manually bill a customer.", "rule(role [ {employee}, department [ {largeBankLeasingSales largeBankLeasingCustomerCare}; type [ {invoice}; {send}; )"),
     # local bank offices
-    f.write("# 15. Only the secretary and office director can read documents sent to the bank office.\n")
-    f.write("rule(role [ {employee}, position [ {secretary director}; ; {view}; office = office)\n\n")
-
+    ("15. Only the secretary and office director can read documents sent to the bank office.", "rule(role [ {employee}, position [ {secretary director}; ; {view}; office = office)"),
     # car leaser
-    f.write("# 16. Any member of the Accounting department can receive and read invoices.\n")
-    f.write("rule(role [ {customer}, department [ {carLeaserAccounting}; type [ {invoice}; {view}; )\n\n")
-
+    ("16. Any member of the Accounting department can receive and read invoices.", "rule(role [ {customer}, department [ {carLeaserAccounting}; type [ {invoice}; {view}; )"),
     # ictProvider
-    f.write("# 17. Only secretary members can read invoices.\n")
-    f.write("rule(role [ {customer}, department [ {ictProviderSecretary}; type [ {invoice}; {view}; )\n\n")
-
+    ("17. Only secretary members can read invoices.", "rule(role [ {customer}, department [ {ictProviderSecretary}; type [ {invoice}; {view}; )"),
     # news agency
-    f.write("# 18. Audit department members can read all invoices, offers, contracts, and paychecks.\n")
-    f.write("rule(role [ {employee}, department [ {newsAgencyAudit}; type [ {invoice salesOffer contract paycheck}; {view}; )\n\n")
-
+    ("18. Audit department members can read all invoices, offers, contracts, and paychecks.", "rule(role [ {employee}, department [ {newsAgencyAudit}; type [ {invoice salesOffer contract paycheck}; {view}; )"),
     # europe region
-    f.write("# 19. Only members of the HR department can send contracts.\n")
-    f.write("rule(role [ {employee}, department [ {europeRegionHR}; type [ {contract}; {send}; )\n\n")
-
+    ("19. Only members of the HR department can send contracts.", "rule(role [ {employee}, department [ {europeRegionHR}; type [ {contract}; {send}; )"),
     # london office
-    f.write("# 20. Members of the Human Resources department can send contracts.\n")
-    f.write("rule(role [ {employee}, department [ {londonOfficeHR}; type [ {contract}; {send}; )\n\n")
-
-    f.write("# 21. Any member of the Sales department can send invoices.\n")
-    f.write("rule(role [ {employee}, department [ {londonOfficeSales}; type [ {invoice}; {send}; )\n\n")
-
-    f.write("# 22. Any member of the Sales department can read all invoices sent by the department.\n")
-    f.write("rule(role [ {employee}, department [ {londonOfficeSales}; type [ {invoice}; {view}; department = department)\n\n")
-
+    ("20. Members of the Human Resources department can send contracts.", "rule(role [ {employee}, department [ {londonOfficeHR}; type [ {contract}; {send}; )"),
+    ("21. Any member of the Sales department can send invoices.", "rule(role [ {employee}, department [ {londonOfficeSales}; type [ {invoice}; {send}; )"),
+    ("22. Any member of the Sales department can read all invoices sent by the department.", "rule(role [ {employee}, department [ {londonOfficeSales}; type [ {invoice}; {view}; department = department)"),
     # reseller
-    f.write("# 23. Only assigned Customer department members can read a subtenant's documents.\n")
-    f.write("rule(role [ {employee}, department [ {resellerCustomer}; ; {view}; uid [ recipients)\n\n")
+    ("23. Only assigned Customer department members can read a subtenant's documents.", "rule(role [ {employee}, department [ {resellerCustomer}; ; {view}; uid [ recipients)"),
+    ("24. Any member of the Accounting department can send invoices.", "rule(role [ {employee}, department [ {resellerAccounting}; type [ {invoice}; {send}; )"),
+    # registered private receivers
+    ("25. Registered Private Receivers can only read documents they received.", "rule(role [ {customer}, tenant [ {privateReceiver}; ; {view}; uid [ recipients)"),
+]
+
+RULES_SECTION = (
+    "\n#------------------------------------------------------------\n"
+    "# ABAC Rules\n"
+    "#------------------------------------------------------------\n\n"
+    + "".join(f"# {comment}\n{rule}\n\n" for comment, rule in RULES)
+)
+
+def generate(filename):
+    # generate users
+    users = []
+    users_by_department = defaultdict(list)
+    userTenants = random.choices(tenants, k=nUsers)
+    tenantCounts = Counter(userTenants)
+    userPositions = {tenant: iter(random.choices(valid_positions_by_tenant[tenant], k=count)) for tenant, count in tenantCounts.items()}
+    userDepartments = {tenant: iter(random.choices(departments[tenant], k=count)) for tenant, count in tenantCounts.items()}
+    userOffices = {tenant: iter(random.choices(tenant_offices[tenant], k=count)) for tenant, count in tenantCounts.items() if offices[tenant] > 0}
+    for i, tenant in enumerate(userTenants):
+        position = next(userPositions[tenant])
+
+        office = "none"
+        if offices[tenant] > 0 or position in ["secretary", "director"]:
+            office = next(userOffices[tenant]) if offices[tenant] > 0 else "none"
+
+        department = next(userDepartments[tenant])
+        user = User(f"user{i}", "employee", organizations[tenant], department, office, position)
+        users.append(user)
+        users_by_department[(tenant, department)].append(i)
+
+    # generate helpdesk operators
+    helpdeskOperators = []
+    for i, tenant in enumerate(random.choices(tenants, k=nHelpdeskOperators)):
+        user = User(f"hdop{i}", "helpdesk", organizations[tenant])
+        helpdeskOperators.append(user)
+
+    # generate application admins
+    applicationAdmins = []
+    for i, tenant in enumerate(random.choices(tenants, k=nApplicationAdmins)):
+        user = User(f"admin{i}", "admin", organizations[tenant])
+        applicationAdmins.append(user)
+
+    # generate customers
+    customers = []
+    for i, tenant in enumerate(random.choices(customerTenants, k=nCustomers)):
+        user = User(f"cstmr{i}", "customer", organizations[tenant], department=random.choice(departments[tenant]))
+        customers.append(user)
+
+    users.extend(helpdeskOperators)
+    users.extend(applicationAdmins)
+    users.extend(customers)
+
+    # index userIds by office and tenant for recipient lookup
+    users_by_office = defaultdict(list)
+    users_by_tenant = defaultdict(list)
+    for user in users:
+        users_by_office[user.office].append(user.userId)
+        users_by_tenant[user.tenant].append(user.userId)
+
+    # supervisor logic: sort employees once by department and descending position, then chain each department group
+    employees_sorted = sorted(users[:nUsers], key=lambda u: (u.tenant, u.department, -position_hierarchy.get(u.position, 0)))
+    for (tenant, department), group in groupby(employees_sorted, key=lambda u: (u.tenant, u.department)):
+        dept_users = list(group)
+        for superior, user in zip(dept_users, dept_users[1:]):
+            user.supervisor = superior.userId
+            superior.supervisee.append(user.userId)
+
+    # update registered attribute based on if they are supervisor
+    for user in users:
+        if user.supervisee:
+            user.registered = True
+        else:
+            user.registered = False
+
+    # assign payrolling permissions: one 50% draw per employee from a single bit string,
+    # then guarantee at least one payrolling employee per department
+    payrollBits = f"{random.getrandbits(nUsers):0{nUsers}b}"
+    for i, user in enumerate(users[:nUsers]):
+        user.payrollingPermissions = payrollBits[i] == "1"
+    for (tenant, department), dept_indices in users_by_department.items():
+        users[random.choice(dept_indices)].payrollingPermissions = True
+
+    # generate documents
+    documents = []
+    docOwners = random.choices(users, k=nDocuments)
+    docTypes = random.choices(documentTypes, k=nDocuments)
+    docConfidential = random.choices((True, False), cum_weights=(0.6, 1.0), k=nDocuments)
+    docPersonalInfo = random.choices((True, False), cum_weights=(0.2, 1.0), k=nDocuments)
+    for i, (owner, docType, confidential, containsPersonalInfo) in enumerate(zip(docOwners, docTypes, docConfidential, docPersonalInfo)):
+        doc = Document(f"doc{i}", docType, owner, users_by_office, users_by_tenant, confidential, containsPersonalInfo)
+        documents.append(doc)
+
+    # assign resources as projects
+    for doc in documents:
+        doc.owner.projects.append(doc.docId)
 
-    f.write("# 24. Any member of the Accounting department can send invoices.\n")
-    f.write("rule(role [ {employee}, department [ {resellerAccounting}; type [ {invoice}; {send}; )\n\n")
+    # output
+    with open(filename, "wb", buffering=1 << 20) as f:
+        f.write(
+            b"# ABAC policy for document management system.\n\n"
+            b"#------------------------------------------------------------\n"
+            b"# User Attribute Data\n"
+            b"#------------------------------------------------------------\n\n"
+        )
+        f.write("\n".join(map(str, users)).encode("ascii"))
 
-    # registered private receivers
-    f.write("# 25. Registered Private Receivers can only read documents they received.\n")
-    f.write("rule(role [ {customer}, tenant [ {privateReceiver}; ; {view}; uid [ recipients)\n\n")
+        f.write(
+            b"\n\n#------------------------------------------------------------\n"
+            b"# Resource Attribute Data\n"
+            b"#------------------------------------------------------------\n\n"
+        )
+        f.write("\n".join(map(str, documents)).encode("ascii"))
+        f.write(b"\n")
+
+        f.write(RULES_SECTION.encode("ascii"))
 
-print(f"ABAC policy generated and saved as '{filename}'.")
+    print(f"ABAC policy generated and saved as '{filename}'.")
 
 
-#
+if __name__ == "__main__":
+    generate("edocument_1000.abac")